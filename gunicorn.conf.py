@@ -0,0 +1,69 @@
+"""Gunicorn serving profile: gunicorn -c gunicorn.conf.py app:app
+
+Everything is tunable through the environment. The database pool is sized
+from the worker layout so that workers * (pool_size + max_overflow) stays
+within DB_MAX_CONNECTIONS.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# sync | gthread | gevent
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# Import the app once in the master so workers fork with it warm
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+# ===== DATABASE POOL SIZING =====
+
+if worker_class == 'gevent':
+    concurrency = worker_connections
+elif worker_class == 'gthread':
+    concurrency = threads
+else:
+    concurrency = 1
+
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+per_worker = max(1, db_max_connections // workers)
+pool_size = min(concurrency, per_worker)
+
+# app.py reads these at import, which happens after this file is loaded
+os.environ.setdefault('DB_POOL_SIZE', str(pool_size))
+# A little headroom for background threads (e.g. the last_login flusher)
+os.environ.setdefault('DB_MAX_OVERFLOW', str(min(2, max(0, per_worker - pool_size))))
+
+
+# ===== HOOKS =====
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master so workers never share sockets"""
+    from app import db
+    with worker.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if worker_class == 'gevent':
+        # Make psycopg2 cooperative under gevent when psycogreen is available
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            worker.log.warning('psycogreen not installed; psycopg2 calls will block the gevent loop')
@@ -0,0 +1,322 @@
+"""Load test for the gunicorn serving profile.
+
+Boots `gunicorn -c gunicorn.conf.py app:app` against a seeded SQLite file
+(or --database-url), drives each route with concurrent keep-alive clients
+for a fixed time and reports throughput and latency percentiles per route:
+
+    python scripts/loadtest.py --workers 4 --threads 8 --duration 10
+    GUNICORN_WORKER_CLASS=sync python scripts/loadtest.py --concurrency 32
+
+Any GUNICORN_* / DB_* variables in the environment reach the server
+unchanged, so configurations can be compared run against run. Requests
+carry real RS256 tokens: a throwaway JWKS is served over HTTPS on
+localhost and the server is pointed at it, so auth costs what it does in
+production (one JWKS fetch per worker, then the token cache).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIENCE = 'https://loadtest.local/api'
+SEED = 7
+
+# name -> (method, path, body); {workout_id} and {exercise_id} in the path
+# are filled in per user, and body (if any) is called with the same ids
+ROUTES = {
+    'health': ('GET', '/api/health', None),
+    'ready': ('GET', '/api/health/ready', None),
+    'user_me': ('GET', '/api/user/me', None),
+    'workouts': ('GET', '/api/workouts?limit=50', None),
+    'workout_detail': ('GET', '/api/workouts/{workout_id}', None),
+    'today': ('GET', '/api/workouts/today', None),
+    'exercises': ('GET', '/api/exercises', None),
+    'exercise_search': ('GET', '/api/exercises/search?q=press', None),
+    'bodyweight': ('GET', '/api/bodyweight?limit=100', None),
+    'analytics': ('GET', '/api/analytics/exercise/{exercise_id}', None),
+    'progression': ('GET', '/api/analytics/exercise/{exercise_id}/progression', None),
+    'volume': ('GET', '/api/analytics/volume?days=90&by=muscle_group', None),
+    'sync': ('GET', '/api/sync', None),
+    'log_set': ('POST', '/api/sets', lambda workout_id, exercise_id: {
+        'workout_id': workout_id, 'exercise_id': exercise_id, 'set_number': 1, 'weight': 60, 'reps': 5
+    }),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class StubIdentityProvider:
+    """JWKS over HTTPS on localhost, plus RS256 tokens signed for it"""
+
+    def __init__(self, workdir):
+        import jwt
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+        import ipaddress
+
+        self._jwt = jwt
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.key.public_key()))
+        body = json.dumps({'keys': [dict(jwk, kid='loadtest', use='sig', alg='RS256')]}).encode()
+
+        # Self-signed certificate for 127.0.0.1, trusted by the server via SSL_CERT_FILE
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, '127.0.0.1')])
+        now = datetime.utcnow()
+        cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(
+            self.key.public_key()
+        ).serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1)).not_valid_after(
+            now + timedelta(days=1)
+        ).add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]), critical=False
+        ).add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True).sign(self.key, hashes.SHA256())
+        self.cert_file = os.path.join(workdir, 'jwks.pem')
+        key_file = os.path.join(workdir, 'jwks.key')
+        with open(self.cert_file, 'wb') as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_file, 'wb') as f:
+            f.write(self.key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_file, key_file)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.domain = f'127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def token(self, sub):
+        now = int(time.time())
+        return self._jwt.encode(
+            {'sub': sub, 'aud': AUDIENCE, 'iss': f'https://{self.domain}/', 'iat': now, 'exp': now + 3600},
+            self.key, algorithm='RS256', headers={'kid': 'loadtest'}
+        )
+
+
+def seed_database(database_url, users, years):
+    """Fresh synthetic history; returns {auth0_id: (workout_id, exercise_id)}"""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.insert(0, ROOT)
+    import app as module
+
+    application = module.create_app()
+    with application.app_context():
+        module.db.create_all()
+        module.seed_default_exercises()
+    result = application.test_cli_runner().invoke(
+        args=['seed-synthetic', '--users', str(users), '--years', str(years), '--seed', str(SEED)]
+    )
+    if result.exit_code != 0:
+        sys.exit(f'seed-synthetic failed:\n{result.output}')
+    with application.app_context():
+        rows = module.db.session.query(module.User.auth0_id, module.func.max(module.Workout.id)).join(
+            module.Workout
+        ).group_by(module.User.auth0_id).all()
+        exercise_id = module.db.session.query(module.WorkoutSet.exercise_id).limit(1).scalar()
+        for engine in module.db.engines.values():
+            engine.dispose()
+    return {auth0_id: (workout_id, exercise_id) for auth0_id, workout_id in rows}
+
+
+def start_server(port, env, database_url):
+    environment = dict(os.environ, **env)
+    environment.update(
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_ACCESSLOG=os.devnull,
+        DATABASE_URL=database_url,
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f'gunicorn exited:\n{server.stderr.read()}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health/ready')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    sys.exit('gunicorn did not become ready within 30 s')
+
+
+def send(connection, method, url, payload, headers):
+    connection.request(method, url, body=payload, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def drive(port, method, path, body, users, concurrency, duration):
+    """Hammer one route; returns (latencies in seconds, status counts, wall seconds).
+
+    `users` is a list of (token, (workout_id, exercise_id)); clients take
+    them round robin.
+    """
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def client(n):
+        token, (workout_id, exercise_id) = users[n % len(users)]
+        url = path.format(workout_id=workout_id, exercise_id=exercise_id)
+        payload = json.dumps(body(workout_id, exercise_id)) if body else None
+        headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine, counts = [], {}
+        start.wait()
+        while time.monotonic() < stop_at[0]:
+            started = time.perf_counter()
+            try:
+                status = send(connection, method, url, payload, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Keep-alive connection closed by a recycled worker
+                # (max_requests): retry once on a new one, as clients do
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                try:
+                    status = send(connection, method, url, payload, headers)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    status = 'error'
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                status = 'error'
+            mine.append(time.perf_counter() - started)
+            counts[status] = counts.get(status, 0) + 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    stop_at[0] = time.monotonic() + duration
+    started = time.monotonic()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.monotonic() - started
+
+
+def summarize(latencies, statuses, wall):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else None
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / wall, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(pick(0.50), 2) if ordered else None,
+        'p99_ms': round(pick(0.99), 2) if ordered else None,
+        'statuses': {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--routes', default=','.join(name for name in ROUTES if name != 'log_set'),
+                        help=f"comma-separated subset of: {', '.join(ROUTES)}")
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per route')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients per route')
+    parser.add_argument('--workers', type=int, help='GUNICORN_WORKERS')
+    parser.add_argument('--threads', type=int, help='GUNICORN_THREADS')
+    parser.add_argument('--worker-class', help='GUNICORN_WORKER_CLASS (sync, gthread, gevent)')
+    parser.add_argument('--users', type=int, default=4, help='synthetic users to seed and spread requests over')
+    parser.add_argument('--years', type=int, default=1, help='years of history per synthetic user')
+    parser.add_argument('--database-url', help='use an already seeded database instead of a fresh SQLite file')
+    parser.add_argument('--rate-limit', action='store_true', help='keep the per-user rate limiter on')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    routes = [name.strip() for name in args.routes.split(',') if name.strip()]
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        identity = StubIdentityProvider(workdir)
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+        env = {
+            'AUTH0_DOMAIN': identity.domain,
+            'AUTH0_API_AUDIENCE': AUDIENCE,
+            'SSL_CERT_FILE': identity.cert_file,
+        }
+        # Passed to the app at import, before create_app
+        os.environ.update(env)
+        if not args.rate_limit:
+            env['RATE_LIMIT_PER_SECOND'] = '0'
+        for flag, name in ((args.workers, 'GUNICORN_WORKERS'), (args.threads, 'GUNICORN_THREADS'),
+                           (args.worker_class, 'GUNICORN_WORKER_CLASS')):
+            if flag is not None:
+                env[name] = str(flag)
+
+        seeded = seed_database(database_url, args.users, args.years)
+        if not seeded:
+            sys.exit('No users with workouts in the database')
+        users = [(identity.token(sub), ids) for sub, ids in sorted(seeded.items())]
+
+        port = free_port()
+        server = start_server(port, env, database_url)
+        try:
+            results = {}
+            for name in routes:
+                method, path, body = ROUTES[name]
+                results[name] = summarize(*drive(port, method, path, body, users, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            identity.server.shutdown()
+
+    profile = {
+        name: env.get(name, os.environ.get(name, 'default'))
+        for name in ('GUNICORN_WORKER_CLASS', 'GUNICORN_WORKERS', 'GUNICORN_THREADS', 'DB_POOL_SIZE', 'DB_MAX_OVERFLOW')
+    }
+    if args.json:
+        print(json.dumps({'profile': profile, 'concurrency': args.concurrency, 'routes': results}, indent=2))
+        return
+    print(f"profile: {', '.join(f'{k}={v}' for k, v in profile.items())}; "
+          f'{args.concurrency} clients, {args.duration:g} s per route')
+    print(f"{'route':<16} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}  statuses")
+    for name, result in results.items():
+        statuses = ' '.join(f'{k}:{v}' for k, v in result['statuses'].items())
+        print(f"{name:<16} {result['rps']:>9} {result['p50_ms']!s:>9} {result['p99_ms']!s:>9}  {statuses}")
+
+
+if __name__ == '__main__':
+    main()
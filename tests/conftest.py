@@ -0,0 +1,132 @@
+"""Shared fixtures: an app on a throwaway SQLite file with auth stubbed out.
+
+Settings that app.py reads at import time are pinned here, before the
+import: jobs run inline at commit, the rate limiter and request coalescing
+are off (tests that need them install their own).
+"""
+import os
+import sys
+
+os.environ['JOB_WORKERS'] = '0'
+os.environ['RATE_LIMIT_PER_SECOND'] = '0'
+os.environ['COALESCE_READS'] = '0'
+os.environ['LAST_LOGIN_FLUSH_INTERVAL'] = '3600'
+os.environ.pop('AUTH0_DOMAIN', None)
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+
+
+def stub_verify_token(token):
+    """Accept any bearer token; the token itself is the auth0 subject"""
+    return {'sub': token, 'email': f'{token}@example.com', 'name': token}
+
+
+def make_app(db_path):
+    application = app_module.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    with application.app_context():
+        app_module.db.create_all()
+        app_module.seed_default_exercises()
+    return application
+
+
+def reset_caches(monkeypatch):
+    """Fresh per-process caches, so nothing leaks between test databases"""
+    monkeypatch.setattr(app_module, 'verify_token', stub_verify_token)
+    monkeypatch.setattr(app_module, '_rate_limiter', None)
+    monkeypatch.setattr(app_module, '_user_cache', app_module.UserIdentityCache())
+    monkeypatch.setattr(app_module, '_analytics_cache', app_module.ResultCache())
+    monkeypatch.setattr(app_module, '_active_sessions', app_module.ActiveSessionCache())
+    monkeypatch.setattr(app_module, '_exercise_catalogue', app_module.ExerciseCatalogue())
+    monkeypatch.setattr(app_module, '_exercise_search', app_module.ExerciseSearchIndex())
+    monkeypatch.setattr(app_module, '_inflight_reads', app_module.SingleFlight())
+
+
+class QueryCounter:
+    """Records the SQL statements (and their parameters) an engine runs while attached"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.parameters = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def __enter__(self):
+        self.statements.clear()
+        self.parameters.clear()
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+class ApiClient:
+    """Flask test client that sends a stubbed bearer token"""
+
+    def __init__(self, client, user='alice'):
+        self.client = client
+        self.user = user
+
+    def as_user(self, user):
+        return ApiClient(self.client, user)
+
+    def request(self, method, url, **kwargs):
+        headers = kwargs.pop('headers', {})
+        headers.setdefault('Authorization', f'Bearer {self.user}')
+        return self.client.open(url, method=method, headers=headers, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def dispose_engines(application):
+    with application.app_context():
+        for engine in app_module.db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # No app context is held open: each request gets its own, as in production
+    reset_caches(monkeypatch)
+    application = make_app(tmp_path / 'test.db')
+    yield application
+    dispose_engines(application)
+
+
+@pytest.fixture
+def api(app):
+    return ApiClient(app.test_client())
+
+
+@pytest.fixture
+def queries(app):
+    with app.app_context():
+        return QueryCounter(app_module.db.engine)
+
+
+@pytest.fixture
+def workout(api):
+    """A started workout for the default user"""
+    return api.post('/api/workouts/start', json={'workout_type': 1}).get_json()
@@ -0,0 +1,133 @@
+"""The cached /api/workouts/today payload stays equal to a fresh read after every write"""
+import json
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+from app import User, Workout, db, workout_payload
+
+
+def fresh_today(app, auth0_id):
+    """Today's payload straight from the database, as the endpoint would JSON it"""
+    with app.app_context():
+        user_id = User.query.filter_by(auth0_id=auth0_id).one().id
+        payload = workout_payload(Workout.user_id == user_id, Workout.date == datetime.utcnow().date())
+        return user_id, json.loads(app.json.dumps(payload or {'workout': None}))
+
+
+def cache_is_current(app, user_id):
+    with app.app_context():
+        version = app_module.current_data_version(user_id)
+    return app_module._active_sessions.get(user_id, datetime.utcnow().date(), version)[0]
+
+
+def start(api, state):
+    state['workout_id'] = api.post('/api/workouts/start', json={'workout_type': 1}).get_json()['id']
+
+
+def start_second(api, state):
+    api.post('/api/workouts/start', json={'workout_type': 2, 'notes': 'evening'})
+
+
+def log_set(api, state):
+    response = api.post('/api/sets', json={
+        'workout_id': state['workout_id'], 'exercise_id': 1,
+        'set_number': len(state['set_ids']) + 1, 'weight': 60, 'reps': 5
+    })
+    state['set_ids'].append(response.get_json()['id'])
+
+
+def update_set(api, state):
+    api.put(f"/api/sets/{state['set_ids'][0]}", json={'weight': 62.5, 'reps': 4, 'rpe': 8})
+
+
+def delete_set(api, state):
+    api.delete(f"/api/sets/{state['set_ids'].pop()}")
+
+
+def delete_dropset_parent(api, state):
+    parent, _ = api.post('/api/sets/batch', json={'sets': [
+        {'workout_id': state['workout_id'], 'exercise_id': 4, 'set_number': 20, 'weight': 100, 'reps': 5, 'ref': 'top'},
+        {'workout_id': state['workout_id'], 'exercise_id': 4, 'set_number': 21, 'weight': 80, 'reps': 8,
+         'dropset_parent_ref': 'top'},
+    ]}).get_json()['sets']
+    api.get('/api/workouts/today')  # cache the chain, then patch it with the delete
+    api.delete(f"/api/sets/{parent['id']}")
+
+
+def end(api, state):
+    api.put(f"/api/workouts/{state['workout_id']}/end")
+
+
+def batch(api, state):
+    response = api.post('/api/sets/batch', json={'sets': [
+        {'workout_id': state['workout_id'], 'exercise_id': 2, 'set_number': i, 'weight': 40, 'reps': 10}
+        for i in range(1, 4)
+    ]})
+    state['set_ids'].extend(item['id'] for item in response.get_json()['sets'])
+
+
+def sync_upsert(api, state):
+    api.post('/api/sync', json={'changes': [
+        {'op': 'upsert', 'entity': 'workout', 'id': state['workout_id'], 'data': {'notes': 'synced'}},
+        {'op': 'upsert', 'entity': 'set', 'client_id': 'phone-1', 'data': {
+            'workout_id': state['workout_id'], 'exercise_id': 3, 'set_number': 9, 'weight': 20, 'reps': 12
+        }},
+    ]})
+
+
+def sync_delete(api, state):
+    api.post('/api/sync', json={'changes': [{'op': 'delete', 'entity': 'set', 'id': state['set_ids'].pop(0)}]})
+
+
+def other_user(api, state):
+    api.as_user('bob').post('/api/workouts/start', json={'workout_type': 3})
+
+
+# (step, whether the cache is patched in place rather than rebuilt)
+STEPS = [
+    (start, True),
+    (log_set, True),
+    (log_set, True),
+    (log_set, True),
+    (update_set, True),
+    (delete_set, True),
+    (start_second, True),
+    (batch, False),
+    (sync_upsert, False),
+    (sync_delete, False),
+    (other_user, True),
+    (delete_dropset_parent, True),
+    (end, True),
+]
+
+
+@pytest.mark.parametrize('upto', range(1, len(STEPS) + 1), ids=[step.__name__ for step, _ in STEPS])
+def test_today_matches_database_after_each_write(app, api, upto):
+    state = {'set_ids': []}
+    for step, patched in STEPS[:upto]:
+        api.get('/api/workouts/today')  # prime the cache
+        step(api, state)
+        user_id, expected = fresh_today(app, 'alice')
+        assert cache_is_current(app, user_id) == patched, step.__name__
+
+        response = api.get('/api/workouts/today')
+        assert response.get_json() == expected, step.__name__
+        assert response.status_code == (200 if expected['workout'] else 404)
+
+
+def test_writes_from_another_worker_are_picked_up(app, api, workout):
+    api.get('/api/workouts/today')
+    # Stands in for a write served by a different process: this worker's
+    # cache never sees it, only the bumped data_version
+    worker_cache = app_module._active_sessions
+    app_module._active_sessions = app_module.ActiveSessionCache()
+    try:
+        api.post('/api/sets', json={'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 1, 'weight': 50, 'reps': 5})
+    finally:
+        app_module._active_sessions = worker_cache
+
+    _, expected = fresh_today(app, 'alice')
+    assert api.get('/api/workouts/today').get_json() == expected
+    assert len(expected['sets']) == 1
@@ -0,0 +1,103 @@
+"""POST /api/sets/batch: per-item validation, and one batch against single POSTs"""
+import time
+
+import pytest
+
+from app import WorkoutSet, db
+
+SETS = 500
+
+
+def items(workout_id, count, **overrides):
+    return [
+        dict({'workout_id': workout_id, 'exercise_id': 1 + i % 3, 'set_number': i, 'weight': 50 + i % 10, 'reps': 5},
+             **overrides)
+        for i in range(count)
+    ]
+
+
+def stored_sets(app):
+    with app.app_context():
+        return db.session.query(WorkoutSet).count()
+
+
+@pytest.mark.parametrize('field, value', [
+    ('weight', 'abc'),
+    ('weight', True),
+    ('reps', '5'),
+    ('reps', 5.5),
+    ('set_number', None),
+    ('exercise_id', {'id': 1}),
+    ('workout_id', [1]),
+    ('rpe', 'hard'),
+    ('rest_time', False),
+    ('tempo', 3),
+    ('is_dropset', 1),
+    ('ref', ['a']),
+])
+def test_bad_values_are_item_errors(app, api, workout, field, value):
+    batch = items(workout['id'], 3)
+    batch[1][field] = value
+    response = api.post('/api/sets/batch', json={'sets': batch})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [s['set_number'] for s in body['sets']] == [0, 2]
+    assert [e['index'] for e in body['errors']] == [1]
+    assert field in body['errors'][0]['error'] or 'Missing' in body['errors'][0]['error']
+    assert stored_sets(app) == 2
+
+
+def test_numbers_accept_ints_and_floats(api, workout):
+    response = api.post('/api/sets/batch', json={'sets': items(workout['id'], 1, weight=62.5, rpe=8)})
+    assert response.status_code == 201
+    assert response.get_json()['sets'][0]['weight'] == 62.5
+
+
+@pytest.mark.parametrize('body', [[1], 'sets', 5, {'sets': {}}, {'sets': []}])
+def test_body_must_be_an_object_with_sets(api, body):
+    response = api.post('/api/sets/batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_dropsets_reference_earlier_items(api, workout):
+    batch = items(workout['id'], 2)
+    batch[0]['ref'] = 'top'
+    batch[1]['dropset_parent_ref'] = 'top'
+    created = api.post('/api/sets/batch', json={'sets': batch}).get_json()['sets']
+    assert created[1]['dropset_parent_id'] == created[0]['id']
+    assert created[1]['is_dropset']
+
+
+@pytest.mark.parametrize('count', [1, 10, SETS])
+def test_batch_statement_count_is_constant(api, queries, workout, count):
+    api.post('/api/sets/batch', json={'sets': items(workout['id'], 1)})  # identity and statements cached
+    with queries:
+        response = api.post('/api/sets/batch', json={'sets': items(workout['id'], count)})
+    assert response.status_code == 201
+    assert len(response.get_json()['sets']) == count
+    # Ownership and exercise lookups, version bump, one INSERT .. RETURNING,
+    # stats and rollup upserts, commit: nothing per set
+    assert len(queries) <= 6, queries.statements
+
+
+def test_batch_beats_single_posts(app, api, queries, workout):
+    batch = items(workout['id'], SETS)
+    started = time.perf_counter()
+    with queries:
+        for item in batch:
+            assert api.post('/api/sets', json=item).status_code == 201
+    single_seconds = time.perf_counter() - started
+    single_statements = len(queries)
+
+    started = time.perf_counter()
+    with queries:
+        response = api.post('/api/sets/batch', json={'sets': batch})
+    batch_seconds = time.perf_counter() - started
+    assert response.status_code == 201
+
+    print(f'\n{SETS} sets: single POSTs {single_seconds * 1000:.0f} ms / {single_statements} statements, '
+          f'one batch {batch_seconds * 1000:.0f} ms / {len(queries)} statements')
+    assert stored_sets(app) == 2 * SETS
+    assert batch_seconds * 5 < single_seconds
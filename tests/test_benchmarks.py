@@ -0,0 +1,249 @@
+"""End-to-end route benchmarks, compared against tests/benchmark_baseline.json.
+
+Every API route is driven through the test client against a copy of one
+seeded database (two synthetic users, two years of history each, plus an
+open workout today). Each case records:
+
+- queries: SQL statements issued by one cold call (caches emptied first)
+- median_ms: median latency over BENCHMARK_ROUNDS warm calls (pytest-benchmark)
+- peak_kib: peak traced Python memory during one call
+
+and fails if any of them regresses past its baseline: more statements at
+all, latency above BENCHMARK_LATENCY_THRESHOLD x baseline (plus
+LATENCY_SLACK_MS), or memory above BENCHMARK_MEMORY_THRESHOLD x baseline
+(plus MEMORY_SLACK_KIB).
+
+Run with BENCHMARK_UPDATE_BASELINE=1 to rewrite the baseline from this run.
+"""
+import itertools
+import json
+import os
+import shutil
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+from conftest import ApiClient, QueryCounter, dispose_engines, make_app, reset_caches
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+UPDATE_BASELINE = os.environ.get('BENCHMARK_UPDATE_BASELINE') == '1'
+ROUNDS = int(os.environ.get('BENCHMARK_ROUNDS', 20))
+LATENCY_THRESHOLD = float(os.environ.get('BENCHMARK_LATENCY_THRESHOLD', 2.0))
+MEMORY_THRESHOLD = float(os.environ.get('BENCHMARK_MEMORY_THRESHOLD', 1.5))
+# Absolute headroom so sub-millisecond routes don't fail on timer noise
+LATENCY_SLACK_MS = 5.0
+MEMORY_SLACK_KIB = 64.0
+
+USER = 'synthetic|7|0'
+
+# `body` builds request kwargs from (ids, n), n counting calls of that case;
+# `setup` runs untimed before each call and returns extra ids
+Case = namedtuple('Case', 'name method path body setup patch', defaults=(None, None, None))
+
+def new_set(api, ids):
+    response = api.post('/api/sets', json={
+        'workout_id': ids['workout_id'], 'exercise_id': ids['exercise_id'],
+        'set_number': 99, 'weight': 1, 'reps': 1
+    })
+    return {'new_set_id': response.get_json()['id']}
+
+
+def sync_changes(ids, n):
+    return {'json': {'changes': [
+        {'op': 'upsert', 'entity': 'workout', 'client_id': f'bench-w{n}', 'data': {'workout_type': 2}},
+        {'op': 'upsert', 'entity': 'set', 'client_id': f'bench-s{n}', 'data': {
+            'workout_client_id': f'bench-w{n}', 'exercise_id': ids['exercise_id'],
+            'set_number': 1, 'weight': 60, 'reps': 5
+        }},
+        {'op': 'upsert', 'entity': 'bodyweight', 'client_id': f'bench-b{n}', 'data': {'weight': 80.5}},
+    ]}}
+
+
+def import_body(ids, n):
+    lines = [
+        json.dumps({'date': f'2020-01-{day:02d}', 'exercise': 'Squat', 'weight': 100 + i, 'reps': 5})
+        for day in range(1, 29) for i in range(3)
+    ]
+    return {'data': '\n'.join(lines), 'content_type': 'application/x-ndjson'}
+
+
+CASES = [
+    Case('health', 'GET', '/api/health'),
+    Case('health_live', 'GET', '/api/health/live'),
+    Case('health_ready', 'GET', '/api/health/ready'),
+    Case('metrics', 'GET', '/api/metrics', patch={'PERF_METRICS_ENABLED': True}),
+    Case('user_me', 'GET', '/api/user/me'),
+    Case('workout_start', 'POST', '/api/workouts/start', body=lambda ids, n: {'json': {'workout_type': 1}}),
+    Case('workout_end', 'PUT', '/api/workouts/{workout_id}/end'),
+    Case('workout_today', 'GET', '/api/workouts/today'),
+    Case('workouts_page', 'GET', '/api/workouts?limit=50'),
+    Case('workouts_stream', 'GET', '/api/workouts?stream=ndjson'),
+    Case('workout_detail', 'GET', '/api/workouts/{workout_id}'),
+    Case('exercises', 'GET', '/api/exercises'),
+    Case('exercise_create', 'POST', '/api/exercises',
+         body=lambda ids, n: {'json': {'name': f'Bench Exercise {n}', 'muscle_group': 'Chest'}}),
+    Case('exercise_search', 'GET', '/api/exercises/search?q=press'),
+    Case('set_log', 'POST', '/api/sets', body=lambda ids, n: {'json': {
+        'workout_id': ids['workout_id'], 'exercise_id': ids['exercise_id'],
+        'set_number': 10 + n, 'weight': 50, 'reps': 8
+    }}),
+    Case('set_batch', 'POST', '/api/sets/batch', body=lambda ids, n: {'json': {'sets': [
+        {'workout_id': ids['workout_id'], 'exercise_id': ids['exercise_id'], 'set_number': i, 'weight': 40, 'reps': 10}
+        for i in range(20)
+    ]}}),
+    Case('set_update', 'PUT', '/api/sets/{set_id}', body=lambda ids, n: {'json': {'weight': 60 + n % 2, 'reps': 5}}),
+    Case('set_delete', 'DELETE', '/api/sets/{new_set_id}', setup=new_set),
+    Case('bodyweight_log', 'POST', '/api/bodyweight', body=lambda ids, n: {'json': {'weight': 80 + n % 3}}),
+    Case('bodyweight_page', 'GET', '/api/bodyweight?limit=100'),
+    Case('bodyweight_series', 'GET', '/api/bodyweight/series?resolution=week&points=50'),
+    Case('bodyweight_latest', 'GET', '/api/bodyweight/latest'),
+    Case('import_ndjson', 'POST', '/api/import', body=import_body),
+    Case('export_csv', 'GET', '/api/export?format=csv'),
+    Case('sync_pull_full', 'GET', '/api/sync'),
+    Case('sync_pull_since', 'GET', '/api/sync?since={watermark}'),
+    Case('sync_push', 'POST', '/api/sync', body=sync_changes),
+    Case('analytics_exercise', 'GET', '/api/analytics/exercise/{exercise_id}'),
+    Case('analytics_exercise_sets', 'GET', '/api/analytics/exercise/{exercise_id}/sets'),
+    Case('analytics_progression', 'GET', '/api/analytics/exercise/{exercise_id}/progression'),
+    Case('analytics_volume', 'GET', '/api/analytics/volume?days=90&by=muscle_group'),
+]
+
+
+@pytest.fixture(scope='module')
+def template(tmp_path_factory):
+    """Seed the shared database once; each case runs on its own copy"""
+    path = tmp_path_factory.mktemp('bench') / 'template.db'
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        reset_caches(monkeypatch)
+        application = make_app(path)
+        runner = application.test_cli_runner()
+        result = runner.invoke(args=['seed-synthetic', '--users', '2', '--years', '2', '--seed', '7'])
+        assert result.exit_code == 0, result.output
+
+        api = ApiClient(application.test_client(), USER)
+        workout = api.post('/api/workouts/start', json={'workout_type': 2}).get_json()
+        exercise_id = 2
+        sets = [
+            api.post('/api/sets', json={
+                'workout_id': workout['id'], 'exercise_id': exercise_id,
+                'set_number': i, 'weight': 60, 'reps': 5
+            }).get_json()
+            for i in range(1, 4)
+        ]
+        ids = {
+            'workout_id': workout['id'],
+            'set_id': sets[0]['id'],
+            'exercise_id': exercise_id,
+            'watermark': api.get('/api/sync').get_json()['watermark'] - 2,
+        }
+        dispose_engines(application)
+    return path, ids
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    recorded = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            recorded = json.load(f)
+    measured = {}
+    yield recorded.get('cases', {}), measured
+
+    if UPDATE_BASELINE and measured:
+        cases = dict(recorded.get('cases', {}), **measured)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.utcnow().date().isoformat(),
+                'rounds': ROUNDS,
+                'cases': {name: cases[name] for name in sorted(cases)}
+            }, f, indent=2)
+            f.write('\n')
+
+
+@pytest.fixture
+def case_app(template, tmp_path, monkeypatch):
+    path, ids = template
+    shutil.copy(path, tmp_path / 'case.db')
+    reset_caches(monkeypatch)
+    application = app_module.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'case.db'}"})
+    yield application, dict(ids)
+    dispose_engines(application)
+
+
+def run_case(api, case, ids, n):
+    kwargs = case.body(ids, n) if case.body else {}
+    response = api.request(case.method, case.path.format(**ids), **kwargs)
+    # Drains streamed bodies too
+    body = response.get_data()
+    assert response.status_code < 400, f'{case.name}: {response.status_code} {body[:200]!r}'
+    return response
+
+
+def test_every_route_has_a_case(app):
+    routes = {
+        (rule.rule, method)
+        for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api.')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    adapter = app.url_map.bind('localhost')
+    placeholders = dict(workout_id=1, set_id=1, new_set_id=1, exercise_id=1, watermark=0)
+    covered = set()
+    for case in CASES:
+        rule, _ = adapter.match(case.path.split('?')[0].format(**placeholders), method=case.method, return_rule=True)
+        covered.add((rule.rule, case.method))
+    assert routes - covered == set()
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case.name for case in CASES])
+def test_route_benchmark(case, case_app, baseline, benchmark, monkeypatch):
+    application, ids = case_app
+    recorded, measured = baseline
+    for name, value in (case.patch or {}).items():
+        monkeypatch.setattr(app_module, name, value)
+    api = ApiClient(application.test_client(), USER)
+    calls = itertools.count()
+
+    def prepare():
+        if case.setup:
+            ids.update(case.setup(api, ids))
+        return (), {}
+
+    # Cold call: empty caches, count statements
+    prepare()
+    with application.app_context():
+        counter = QueryCounter(app_module.db.engine)
+    with counter:
+        run_case(api, case, ids, next(calls))
+
+    # Memory of one (warm) call
+    prepare()
+    tracemalloc.start()
+    try:
+        run_case(api, case, ids, next(calls))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    benchmark.pedantic(lambda: run_case(api, case, ids, next(calls)), setup=prepare,
+                       rounds=ROUNDS, warmup_rounds=1)
+
+    result = {'queries': len(counter), 'peak_kib': round(peak / 1024, 1)}
+    if benchmark.stats is not None:
+        result['median_ms'] = round(benchmark.stats.stats.median * 1000, 3)
+    benchmark.extra_info.update(result)
+    measured[case.name] = result
+    if UPDATE_BASELINE:
+        return
+
+    expected = recorded.get(case.name)
+    assert expected is not None, f'No baseline for {case.name}; run with BENCHMARK_UPDATE_BASELINE=1'
+    assert result['queries'] <= expected['queries'], \
+        f"{case.name}: {result['queries']} statements, baseline {expected['queries']}: {counter.statements}"
+    assert result['peak_kib'] <= expected['peak_kib'] * MEMORY_THRESHOLD + MEMORY_SLACK_KIB, \
+        f"{case.name}: peak {result['peak_kib']} KiB, baseline {expected['peak_kib']} KiB"
+    if 'median_ms' in result and 'median_ms' in expected:
+        assert result['median_ms'] <= expected['median_ms'] * LATENCY_THRESHOLD + LATENCY_SLACK_MS, \
+            f"{case.name}: median {result['median_ms']} ms, baseline {expected['median_ms']} ms"
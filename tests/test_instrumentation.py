@@ -0,0 +1,64 @@
+"""PERF_METRICS instrumentation: /api/metrics access and per-statement timing"""
+import copy
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+from app import db
+from conftest import ApiClient, dispose_engines, make_app
+
+
+@pytest.fixture
+def metrics_app(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'PERF_METRICS_ENABLED', True)
+    application = make_app(tmp_path / 'metrics.db')
+    yield application
+    dispose_engines(application)
+
+
+def scrape(application, remote_addr='127.0.0.1', token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return application.test_client().get('/api/metrics', headers=headers,
+                                          environ_base={'REMOTE_ADDR': remote_addr})
+
+
+def test_metrics_are_served_to_allowed_ips(metrics_app):
+    ApiClient(metrics_app.test_client()).get('/api/workouts')
+    response = scrape(metrics_app)
+    assert response.status_code == 200
+    assert 'route="/api/workouts"' in response.get_data(as_text=True)
+
+
+def test_metrics_are_refused_to_other_clients(metrics_app, monkeypatch):
+    assert scrape(metrics_app, '203.0.113.7').status_code == 403
+
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-secret')
+    assert scrape(metrics_app, '203.0.113.7', token='wrong').status_code == 403
+    assert scrape(metrics_app, '203.0.113.7', token='scrape-secret').status_code == 200
+
+    monkeypatch.setattr(app_module, 'METRICS_ALLOWED_IPS', set())
+    assert scrape(metrics_app).status_code == 403
+
+
+def test_metrics_are_hidden_when_disabled(app):
+    assert scrape(app).status_code == 404
+
+
+def test_failed_statements_leave_no_timing_state(metrics_app):
+    with metrics_app.app_context():
+        with db.engine.connect() as conn:
+            before = copy.deepcopy(dict(conn.info))
+            for _ in range(5):
+                with pytest.raises(OperationalError):
+                    conn.execute(text('SELECT * FROM no_such_table'))
+                conn.rollback()
+            assert conn.execute(text('SELECT 1')).scalar() == 1
+            assert dict(conn.info) == before
+
+
+def test_server_timing_counts_statements(metrics_app):
+    response = ApiClient(metrics_app.test_client()).get('/api/workouts')
+    timing = dict(part.split(';', 1) for part in response.headers['Server-Timing'].split(', '))
+    assert set(timing) >= {'db', 'auth', 'json', 'total'}
@@ -0,0 +1,188 @@
+"""History and analytics reads for one user with a long history (100k sets by default).
+
+Reports latency, peak traced Python memory and peak RSS growth per call,
+next to the pre-pagination way of serving the same data (every row
+materialized into one JSON body), and checks that the keyset pages and
+streams stay bounded. LARGE_HISTORY_SETS changes the size.
+"""
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+from flask import jsonify
+from sqlalchemy import insert
+
+import app as app_module
+from app import User, Workout, WorkoutSet, db
+from conftest import ApiClient, dispose_engines, make_app, reset_caches
+
+SETS = int(os.environ.get('LARGE_HISTORY_SETS', 100000))
+SETS_PER_WORKOUT = 20
+END = date(2024, 6, 30)
+CALLS = 3
+
+
+def seed(user_id, sets):
+    rng = random.Random(4)
+    count = sets // SETS_PER_WORKOUT
+    workouts = [
+        {'id': n + 1, 'user_id': user_id, 'date': END - timedelta(days=count - 1 - n), 'workout_type': 1}
+        for n in range(count)
+    ]
+    rows = [
+        {'workout_id': n + 1, 'user_id': user_id, 'exercise_id': 1 + i % 5, 'set_number': i,
+         'weight': round(rng.uniform(40, 140) / 2.5) * 2.5, 'reps': rng.randint(1, 12)}
+        for n in range(count) for i in range(SETS_PER_WORKOUT)
+    ]
+    db.session.execute(insert(Workout), workouts)
+    for i in range(0, len(rows), 10000):
+        db.session.execute(insert(WorkoutSet), rows[i:i + 10000])
+    db.session.commit()
+    app_module.backfill_derived_tables()
+
+
+@pytest.fixture(scope='module')
+def lifter(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        reset_caches(monkeypatch)
+        application = make_app(tmp_path_factory.mktemp('history') / 'history.db')
+        with application.app_context():
+            user = User(auth0_id='lifter')
+            db.session.add(user)
+            db.session.commit()
+            seed(user.id, SETS)
+        yield application, ApiClient(application.test_client(), 'lifter')
+        dispose_engines(application)
+
+
+def peak_rss_kib():
+    """Process high-water RSS (Linux), or None where /proc isn't available"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def measure(fn):
+    """(median ms, traced peak KiB, RSS growth KiB or None) of fn()"""
+    fn()  # warm the statement caches
+    timings = []
+    for _ in range(CALLS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    rss_reset = reset_peak_rss()
+    rss_before = peak_rss_kib()
+    tracemalloc.start()
+    try:
+        fn()
+        traced = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    rss = peak_rss_kib() - rss_before if rss_reset and rss_before is not None else None
+    return statistics.median(timings), traced, rss
+
+
+def get(api, url):
+    def call():
+        app_module._analytics_cache = app_module.ResultCache()  # cold analytics every call
+        # Unbuffered and discarded chunk by chunk, so only the server's own
+        # memory is measured, not a copy of the body held by the test client
+        response = api.get(url, buffered=False)
+        assert response.status_code == 200, url
+        size = 0
+        for chunk in response.response:
+            size += len(chunk)
+        response.close()
+        return size
+    return call
+
+
+def materialized(application, query):
+    """The pre-pagination shape: every row loaded, then one jsonify"""
+    def call():
+        with application.test_request_context():
+            return jsonify([row._asdict() for row in query().all()]).get_data()
+    return call
+
+
+def report(name, result):
+    ms, traced, rss = result
+    print(f'{name:<44} {ms:8.1f} ms {traced:10.0f} KiB traced' + (f' {rss:8.0f} KiB RSS' if rss is not None else ''))
+
+
+@pytest.fixture(scope='module')
+def results(lifter):
+    application, api = lifter
+    with application.app_context():
+        user_id = User.query.filter_by(auth0_id='lifter').one().id
+        oldest = db.session.query(Workout.date, Workout.id).order_by(Workout.date, Workout.id).offset(50).first()
+        deep_cursor = app_module.encode_cursor(oldest.date, oldest.id)
+
+    workouts = lambda: app_module.with_set_counts(
+        db.session.query(*app_module.WORKOUT_COLUMNS).filter(Workout.user_id == user_id)
+    ).order_by(Workout.date.desc(), Workout.id.desc())
+    sets = lambda: app_module.set_rows_query(Workout.date).join(Workout, Workout.id == WorkoutSet.workout_id).filter(
+        WorkoutSet.exercise_id == 1, Workout.user_id == user_id
+    ).order_by(Workout.date.desc(), WorkoutSet.id.desc())
+
+    cases = {
+        'workouts: materialized (before)': materialized(application, workouts),
+        'workouts: first page': get(api, '/api/workouts?limit=50'),
+        'workouts: deep page': get(api, f'/api/workouts?limit=50&cursor={deep_cursor}'),
+        'workouts: ndjson stream': get(api, '/api/workouts?stream=ndjson'),
+        'exercise sets: materialized (before)': materialized(application, sets),
+        'exercise sets: first page': get(api, '/api/analytics/exercise/1/sets?limit=100'),
+        'exercise sets: json stream': get(api, '/api/analytics/exercise/1/sets?stream=json'),
+        'analytics: exercise summary': get(api, '/api/analytics/exercise/1'),
+        'analytics: progression': get(api, '/api/analytics/exercise/1/progression'),
+        'analytics: volume by muscle group': get(api, '/api/analytics/volume?days=365&by=muscle_group'),
+    }
+    measured = {}
+    print(f'\n{SETS} sets:')
+    for name, fn in cases.items():
+        with application.app_context():
+            measured[name] = measure(fn)
+        report(name, measured[name])
+    return measured
+
+
+def test_streams_use_a_fraction_of_materialized_memory(results):
+    for prefix, stream in (('workouts', 'ndjson stream'), ('exercise sets', 'json stream')):
+        before = results[f'{prefix}: materialized (before)'][1]
+        assert results[f'{prefix}: {stream}'][1] * 5 < before, prefix
+
+
+def test_pages_are_bounded(results):
+    for prefix, page in (('workouts', 'first page'), ('exercise sets', 'first page')):
+        ms, traced, _ = results[f'{prefix}: {page}']
+        before_ms, before_traced, _ = results[f'{prefix}: materialized (before)']
+        assert traced * 10 < before_traced, prefix
+        assert ms < before_ms, prefix
+
+
+def test_deep_pages_cost_the_same_as_the_first(results):
+    first = results['workouts: first page'][0]
+    assert results['workouts: deep page'][0] <= first * 3 + 5
+
+
+def test_analytics_summary_memory_does_not_grow_with_history(results):
+    # Aggregates and a 10-row recent list, whatever the history length
+    assert results['analytics: exercise summary'][1] < 1024
@@ -0,0 +1,26 @@
+"""scripts/loadtest.py boots gunicorn with gunicorn.conf.py and reports every route it drives"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_loadtest_smoke(tmp_path):
+    environment = dict(os.environ, JOB_WORKERS='0')
+    result = subprocess.run(
+        [sys.executable, 'scripts/loadtest.py', '--json', '--duration', '0.5', '--concurrency', '2',
+         '--workers', '1', '--threads', '2', '--users', '1', '--routes', 'health,user_me,workouts,log_set'],
+        cwd=ROOT, env=environment, capture_output=True, text=True, timeout=180
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout[result.stdout.index('{'):])
+
+    assert report['profile']['GUNICORN_WORKERS'] == '1'
+    assert set(report['routes']) == {'health', 'user_me', 'workouts', 'log_set'}
+    for name, route in report['routes'].items():
+        assert route['requests'] > 0, name
+        assert route['p99_ms'] >= route['p50_ms'], name
+        # Real RS256 tokens against the stub JWKS: nothing may come back 401
+        assert set(route['statuses']) <= {'200', '201'}, (name, route['statuses'])
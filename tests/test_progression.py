@@ -0,0 +1,98 @@
+"""PR detection in compute_progression: the SQL window path against a plain Python scan.
+
+The default size runs in a few seconds. Set PROGRESSION_BENCH_SETS=1000000
+for the full-size comparison.
+"""
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app import User, Workout, WorkoutSet, compute_progression, db, estimate_1rm
+from conftest import dispose_engines, make_app
+
+SETS = int(os.environ.get('PROGRESSION_BENCH_SETS', 20000))
+SETS_PER_WORKOUT = 20
+EXERCISE_ID = 1
+END = date(2024, 6, 30)
+
+
+def fill(rng, user_id, sets, workout_ids, set_ids):
+    """`sets` sets over one workout a day ending at END, half of them EXERCISE_ID"""
+    workouts, rows = [], []
+    count = sets // SETS_PER_WORKOUT
+    for n in range(count):
+        workout_id = next(workout_ids)
+        day = END - timedelta(days=count - 1 - n)
+        workouts.append({'id': workout_id, 'user_id': user_id, 'date': day, 'workout_type': 1})
+        # Slow progression with noise, so PRs are occasional
+        base = 60 + 40 * n / count
+        for i in range(SETS_PER_WORKOUT):
+            rows.append({
+                'id': next(set_ids), 'workout_id': workout_id, 'user_id': user_id,
+                'exercise_id': EXERCISE_ID if i % 2 == 0 else 2, 'set_number': i,
+                'weight': round(rng.gauss(base, 8) / 2.5) * 2.5, 'reps': rng.randint(1, 12)
+            })
+    db.session.execute(insert(Workout), workouts)
+    db.session.execute(insert(WorkoutSet), rows)
+
+
+@pytest.fixture(scope='module')
+def history(tmp_path_factory):
+    application = make_app(tmp_path_factory.mktemp('progression') / 'progression.db')
+    with application.app_context():
+        users = [User(auth0_id='lifter'), User(auth0_id='other')]
+        db.session.add_all(users)
+        db.session.flush()
+        rng = random.Random(15)
+        workout_ids, set_ids = iter(range(1, SETS)), iter(range(1, 2 * SETS + 1))
+        fill(rng, users[0].id, SETS, workout_ids, set_ids)
+        fill(rng, users[1].id, SETS // 10, workout_ids, set_ids)
+        db.session.commit()
+        user_id = users[0].id
+    yield application, user_id
+    dispose_engines(application)
+
+
+def naive_prs(user_id, start_date, full_history=True):
+    """Every set in date order; a PR beats the best estimate of all sets before it"""
+    rows = db.session.query(WorkoutSet.id, Workout.date, WorkoutSet.weight, WorkoutSet.reps).join(
+        Workout, Workout.id == WorkoutSet.workout_id
+    ).filter(
+        Workout.user_id == user_id, WorkoutSet.exercise_id == EXERCISE_ID
+    ).order_by(Workout.date, WorkoutSet.id)
+    if not full_history and start_date is not None:
+        rows = rows.filter(Workout.date >= start_date)
+    prs, best = [], None
+    for set_id, day, weight, reps in rows:
+        e1rm = estimate_1rm(weight, reps)
+        if best is None or e1rm > best:
+            if start_date is None or day >= start_date:
+                prs.append({'set_id': set_id, 'date': day, 'weight': weight, 'reps': reps, 'e1rm': round(e1rm, 2)})
+            best = e1rm
+    return prs
+
+
+@pytest.mark.parametrize('days', [None, 730, 90])
+def test_prs_match_naive_scan(history, days):
+    application, user_id = history
+    start_date = END - timedelta(days=days) if days else None
+    with application.app_context():
+        started = time.perf_counter()
+        prs = compute_progression(user_id, EXERCISE_ID, 'epley', start_date)['prs']
+        sql_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = naive_prs(user_id, start_date)
+        naive_seconds = time.perf_counter() - started
+        window_only = naive_prs(user_id, start_date, full_history=False)
+
+    print(f'\n{SETS} sets, days={days}: compute_progression {sql_seconds * 1000:.0f} ms '
+          f'(whole payload), naive PR scan {naive_seconds * 1000:.0f} ms, {len(prs)} PRs')
+    assert prs == expected
+    if days:
+        # Judged against the window alone, its first set would always be a PR
+        assert len(prs) < len(window_only)
@@ -0,0 +1,54 @@
+"""Read endpoints issue a fixed number of SQL statements, however much data they return"""
+import pytest
+
+from conftest import reset_caches
+
+# Statements per cold call (auth and user lookup included)
+MAX_STATEMENTS = {
+    '/api/workouts?limit=50': 3,
+    '/api/workouts?stream=ndjson': 3,
+    '/api/workouts/{workout_id}': 4,
+    '/api/workouts/today': 4,
+    '/api/exercises': 1,
+    '/api/bodyweight?limit=100': 3,
+    '/api/analytics/exercise/1/sets': 3,
+    '/api/sync': 5,
+    '/api/sync?since=1': 6,
+    '/api/export?format=csv': 2,
+}
+
+
+def log_workouts(api, workouts, sets_per_workout):
+    last = None
+    for day in range(1, workouts + 1):
+        last = api.post('/api/workouts/start', json={'workout_type': 1, 'date': f'2024-03-{day:02d}'}).get_json()
+        response = api.post('/api/sets/batch', json={'sets': [
+            {'workout_id': last['id'], 'exercise_id': 1 + i % 3, 'set_number': i, 'weight': 50 + i, 'reps': 5}
+            for i in range(sets_per_workout)
+        ]})
+        assert response.status_code == 201
+        api.post('/api/bodyweight', json={'weight': 80, 'date': f'2024-03-{day:02d}'})
+    return last
+
+
+def count_statements(api, queries, monkeypatch, url):
+    reset_caches(monkeypatch)
+    with queries:
+        response = api.get(url)
+        response.get_data()
+    assert response.status_code == 200, url
+    return len(queries)
+
+
+@pytest.mark.parametrize('url', sorted(MAX_STATEMENTS))
+def test_statement_count_is_independent_of_result_size(api, queries, monkeypatch, url):
+    small = log_workouts(api, 1, 1)
+    api.post('/api/workouts/start', json={'workout_type': 1})
+    few = count_statements(api, queries, monkeypatch, url.format(workout_id=small['id']))
+
+    log_workouts(api.as_user('bob'), 25, 8)
+    log_workouts(api, 25, 8)
+    many = count_statements(api, queries, monkeypatch, url.format(workout_id=small['id']))
+
+    assert few == many, f'{url}: {few} statements for one workout, {many} for 26: {queries.statements}'
+    assert many <= MAX_STATEMENTS[url], f'{url}: {many} statements: {queries.statements}'
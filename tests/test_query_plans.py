@@ -0,0 +1,73 @@
+"""EXPLAIN QUERY PLAN for every read path: the large tables are only ever reached through an index.
+
+SQLite reports a full-table (or full-index) pass as `SCAN <table>` and an
+index lookup as `SEARCH <table> USING ...`; any SCAN of a per-user table
+means the query reads every user's rows.
+"""
+import re
+
+import pytest
+
+from app import db
+
+LARGE_TABLES = ('workouts', 'workout_sets', 'body_weights', 'daily_volume', 'exercise_stats', 'tombstones')
+FULL_SCAN = re.compile(r'^SCAN (%s)\b' % '|'.join(LARGE_TABLES))
+
+URLS = [
+    '/api/workouts?limit=50',
+    '/api/workouts?stream=ndjson',
+    '/api/workouts/{workout_id}',
+    '/api/workouts/today',
+    '/api/analytics/exercise/1',
+    '/api/analytics/exercise/1/sets',
+    '/api/analytics/exercise/1/progression',
+    '/api/analytics/volume?days=90&by=muscle_group',
+    '/api/sync',
+    '/api/sync?since=1',
+    '/api/bodyweight?limit=100',
+    '/api/bodyweight/series?resolution=week&points=10',
+    '/api/bodyweight/latest',
+    '/api/export?format=csv',
+]
+
+
+def query_plans(app, queries):
+    """(statement, plan steps) for each SELECT the counter captured"""
+    plans = []
+    with app.app_context(), db.engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for statement, parameters in zip(queries.statements, queries.parameters):
+            if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            steps = [row[3] for row in raw.execute('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            plans.append((statement, steps))
+    return plans
+
+
+@pytest.fixture
+def history(api):
+    """Two users with a few workouts, sets and weigh-ins each"""
+    for user in ('alice', 'bob'):
+        client = api.as_user(user)
+        for day in range(1, 4):
+            workout = client.post('/api/workouts/start', json={'workout_type': 1, 'date': f'2024-03-{day:02d}'}).get_json()
+            client.post('/api/sets/batch', json={'sets': [
+                {'workout_id': workout['id'], 'exercise_id': 1, 'set_number': i, 'weight': 60 + i, 'reps': 5}
+                for i in range(3)
+            ]})
+            client.post('/api/bodyweight', json={'weight': 80, 'date': f'2024-03-{day:02d}'})
+    return api.post('/api/workouts/start', json={'workout_type': 1}).get_json()
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_no_full_scans_of_large_tables(app, api, queries, history, url):
+    with queries:
+        response = api.get(url.format(workout_id=history['id']))
+        response.get_data()
+    assert response.status_code == 200, url
+
+    plans = query_plans(app, queries)
+    assert plans, f'{url} issued no SELECT'
+    for statement, steps in plans:
+        scans = [step for step in steps if FULL_SCAN.match(step)]
+        assert not scans, f'{url}: {scans} in plan {steps} for\n{statement}'
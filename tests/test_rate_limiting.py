@@ -0,0 +1,129 @@
+"""Rate limiting and read coalescing under concurrent bursts"""
+import os
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+from app import db
+from conftest import ApiClient
+
+
+def burst(app, url, count, user='alice'):
+    """Fire `count` GETs at once, one thread and test client each"""
+    start = threading.Barrier(count)
+    responses = [None] * count
+
+    def worker(i):
+        api = ApiClient(app.test_client(), user)
+        start.wait()
+        responses[i] = api.get(url)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    # Refills far slower than the test runs, so only the burst gets through
+    buckets = app_module.MemoryTokenBuckets(rate=0.1, burst=5)
+    monkeypatch.setattr(app_module, '_rate_limiter', buckets)
+    return buckets
+
+
+def test_burst_beyond_bucket_is_rejected_with_retry_after(app, limiter):
+    responses = burst(app, '/api/user/me', 20)
+
+    ok = [r for r in responses if r.status_code == 200]
+    limited = [r for r in responses if r.status_code == 429]
+    assert len(ok) == 5
+    assert len(limited) == 15
+    for response in limited:
+        assert response.get_json() == {'error': 'Too many requests'}
+        assert 1 <= int(response.headers['Retry-After']) <= 10
+
+
+def test_buckets_are_per_user_and_route(app, api, limiter):
+    assert all(r.status_code == 200 for r in burst(app, '/api/user/me', 5))
+    assert api.get('/api/user/me').status_code == 429
+
+    assert api.get('/api/exercises').status_code == 200
+    assert api.as_user('bob').get('/api/user/me').status_code == 200
+
+
+def test_bucket_refills_over_time():
+    buckets = app_module.MemoryTokenBuckets(rate=50, burst=1)
+    assert buckets.take('key') == (True, 0)
+    allowed, retry_after = buckets.take('key')
+    assert not allowed
+    assert 0 < retry_after <= 0.02
+    time.sleep(0.05)
+    assert buckets.take('key')[0]
+
+
+def test_identical_concurrent_reads_share_one_query(app, api, workout, monkeypatch):
+    monkeypatch.setattr(app_module, 'COALESCE_READS', True)
+    api.get('/api/user/me')  # identity cached, so only the view queries remain
+    with app.app_context():
+        engine = db.engine
+
+    listed = []
+
+    def slow_listing(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'FROM workouts' in statement:
+            listed.append(statement)
+            # Hold the leader so the other requests arrive while it runs
+            time.sleep(0.2)
+
+    event.listen(engine, 'before_cursor_execute', slow_listing)
+    try:
+        responses = burst(app, '/api/workouts?limit=20', 8)
+    finally:
+        event.remove(engine, 'before_cursor_execute', slow_listing)
+
+    assert [r.status_code for r in responses] == [200] * 8
+    assert len({r.get_data() for r in responses}) == 1
+    assert responses[0].get_json()[0]['id'] == workout['id']
+    assert len(listed) == 1
+
+
+def test_coalescing_is_per_user(app, api, monkeypatch):
+    monkeypatch.setattr(app_module, 'COALESCE_READS', True)
+    api.post('/api/bodyweight', json={'weight': 80})
+    api.as_user('bob').post('/api/bodyweight', json={'weight': 95})
+
+    alice, bob = {}, {}
+    start = threading.Barrier(2)
+
+    def fetch(user, into):
+        client = ApiClient(app.test_client(), user)
+        start.wait()
+        into.update(client.get('/api/bodyweight/latest').get_json())
+
+    threads = [threading.Thread(target=fetch, args=args) for args in (('alice', alice), ('bob', bob))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert alice['weight'] == 80
+    assert bob['weight'] == 95
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_REDIS_URL'), reason='TEST_REDIS_URL not set')
+def test_redis_buckets_are_shared_between_workers():
+    pytest.importorskip('redis')
+    url = os.environ['TEST_REDIS_URL']
+    key = (f'test-{time.time_ns()}', 'api.get_current_user')
+    # Two instances stand in for two worker processes
+    first = app_module.RedisTokenBuckets(url, rate=0.1, burst=4)
+    second = app_module.RedisTokenBuckets(url, rate=0.1, burst=4)
+
+    results = [bucket.take(key) for bucket in (first, second) * 3]
+    assert [allowed for allowed, _ in results] == [True] * 4 + [False] * 2
+    assert all(retry_after > 0 for allowed, retry_after in results if not allowed)
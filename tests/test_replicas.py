@@ -0,0 +1,133 @@
+"""Read-replica routing with two SQLite files standing in for primary and replica.
+
+`replicate()` copies the primary over the replica, so between calls the
+replica lags exactly like a real one that hasn't replayed recent writes.
+"""
+import shutil
+
+import pytest
+
+import app as app_module
+from app import Workout, db
+from conftest import ApiClient, QueryCounter, dispose_engines, reset_caches
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Cluster:
+    def __init__(self, application, primary, replica):
+        self.app = application
+        self.primary = primary
+        self.replica = replica
+        self.api = ApiClient(application.test_client())
+        with application.app_context():
+            self.primary_queries = QueryCounter(db.engines[None])
+            self.replica_queries = QueryCounter(db.engines['replica_1'])
+
+    def replicate(self):
+        with self.app.app_context():
+            db.engines['replica_1'].dispose()
+        shutil.copy(self.primary, self.replica)
+
+    def on_replica(self, statement, *params):
+        """Run a statement against the replica only, e.g. to mark its copy of a row"""
+        with self.app.app_context(), db.engines['replica_1'].begin() as conn:
+            conn.exec_driver_sql(statement, params)
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    reset_caches(monkeypatch)
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    application = app_module.create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'SQLALCHEMY_BINDS': {'replica_1': f'sqlite:///{replica}'},
+    })
+    with application.app_context():
+        db.create_all()
+        app_module.seed_default_exercises()
+    cluster = Cluster(application, primary, replica)
+    workout = cluster.api.post('/api/workouts/start', json={'workout_type': 1, 'date': '2024-03-01'}).get_json()
+    cluster.api.post('/api/sets', json={
+        'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 1, 'weight': 100, 'reps': 5
+    })
+    cluster.replicate()
+    cluster.workout = workout
+    yield cluster
+    dispose_engines(application)
+    # init_app registers a metadata per bind on the shared db; later apps have no replica_1
+    db.metadatas.pop('replica_1', None)
+
+
+def notes(api):
+    return {w['id']: w['notes'] for w in api.get('/api/workouts').get_json()}
+
+
+def test_history_and_analytics_read_from_the_replica(cluster):
+    cluster.on_replica('UPDATE workouts SET notes = ?', 'from replica')
+    assert notes(cluster.api) == {cluster.workout['id']: 'from replica'}
+
+    for url in ('/api/workouts', '/api/analytics/exercise/1', '/api/analytics/exercise/1/sets',
+                '/api/analytics/exercise/1/progression', '/api/bodyweight', '/api/export?format=csv'):
+        with cluster.replica_queries:
+            response = cluster.api.get(url)
+            response.get_data()
+        assert response.status_code == 200, url
+        # The staleness check plus the view's own reads
+        assert len(cluster.replica_queries) > 1, url
+
+
+def test_own_write_forces_primary_until_replica_catches_up(cluster):
+    cluster.on_replica('UPDATE workouts SET notes = ?', 'from replica')
+    second = cluster.api.post('/api/workouts/start', json={'workout_type': 2, 'date': '2024-03-02'}).get_json()
+
+    # The replica hasn't replayed the write: served by the primary, new row included
+    assert notes(cluster.api) == {cluster.workout['id']: '', second['id']: ''}
+
+    cluster.replicate()
+    cluster.on_replica('UPDATE workouts SET notes = ?', 'from replica')
+    assert notes(cluster.api) == {cluster.workout['id']: 'from replica', second['id']: 'from replica'}
+
+
+def test_other_users_writes_do_not_force_primary(cluster):
+    cluster.on_replica('UPDATE workouts SET notes = ?', 'from replica')
+    cluster.api.as_user('bob').post('/api/workouts/start', json={'workout_type': 1})
+    assert set(notes(cluster.api).values()) == {'from replica'}
+
+
+def test_writes_never_reach_the_replica(cluster):
+    api, workout = cluster.api, cluster.workout
+    with cluster.replica_queries:
+        api.post('/api/workouts/start', json={'workout_type': 1})
+        logged = api.post('/api/sets', json={
+            'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 2, 'weight': 90, 'reps': 6
+        }).get_json()
+        api.put(f"/api/sets/{logged['id']}", json={'weight': 95})
+        api.post('/api/sets/batch', json={'sets': [
+            {'workout_id': workout['id'], 'exercise_id': 2, 'set_number': 3, 'weight': 40, 'reps': 10}
+        ]})
+        api.post('/api/bodyweight', json={'weight': 81})
+        api.post('/api/sync', json={'changes': [
+            {'op': 'upsert', 'entity': 'workout', 'id': workout['id'], 'data': {'notes': 'synced'}}
+        ]})
+        api.delete(f"/api/sets/{logged['id']}")
+        api.put(f"/api/workouts/{workout['id']}/end")
+        # Reads in between, some of them routed to the replica
+        api.get('/api/workouts')
+        api.get('/api/analytics/exercise/1')
+    assert [s for s in cluster.replica_queries.statements if s.lstrip().upper().startswith(WRITES)] == []
+
+    with cluster.app.app_context():
+        assert db.session.get(Workout, workout['id']).notes == 'synced'
+
+
+def test_unreachable_replica_falls_back_to_primary(cluster):
+    with cluster.app.app_context():
+        db.engines['replica_1'].dispose()
+    # A directory where the database file was: the staleness check can't connect
+    cluster.replica.unlink()
+    cluster.replica.mkdir()
+
+    response = cluster.api.get('/api/workouts')
+    assert response.status_code == 200
+    assert [w['id'] for w in response.get_json()] == [cluster.workout['id']]
@@ -0,0 +1,76 @@
+"""Serializing 10k sets: hydrated ORM objects through to_dict() and the stdlib
+encoder (how responses were built before) against the column projection,
+_asdict() and the app's JSON provider. Both must produce the same JSON.
+"""
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app import User, Workout, WorkoutSet, db, set_rows_query
+from conftest import dispose_engines, make_app
+
+SETS = 10000
+ROUNDS = 5
+
+
+@pytest.fixture(scope='module')
+def workout(tmp_path_factory):
+    application = make_app(tmp_path_factory.mktemp('serialization') / 'serialization.db')
+    with application.app_context():
+        user = User(auth0_id='lifter')
+        db.session.add(user)
+        db.session.flush()
+        workout = Workout(user_id=user.id, workout_type=1)
+        db.session.add(workout)
+        db.session.flush()
+        started = datetime(2024, 3, 1, 18, 0, 0, 123456)
+        db.session.execute(insert(WorkoutSet), [
+            {'workout_id': workout.id, 'user_id': user.id, 'exercise_id': 1 + i % 20, 'set_number': i,
+             'weight': 20 + (i % 40) * 2.5, 'reps': 1 + i % 12, 'rpe': 7.5 if i % 3 else None,
+             'feel_rating': i % 5 or None, 'tempo': 'normal', 'rest_time': 90, 'is_dropset': i % 7 == 0,
+             'notes': '' if i % 4 else f'set {i} felt "heavy"', 'created_at': started + timedelta(seconds=30 * i),
+             'client_id': f'device-{i}' if i % 2 else None}
+            for i in range(SETS)
+        ])
+        db.session.commit()
+        workout_id = workout.id
+    yield application, workout_id
+    dispose_engines(application)
+
+
+def orm_path(application, workout_id):
+    sets = WorkoutSet.query.filter(WorkoutSet.workout_id == workout_id).order_by(WorkoutSet.id).all()
+    return json.dumps([s.to_dict() for s in sets])
+
+
+def projection_path(application, workout_id):
+    rows = set_rows_query().filter(WorkoutSet.workout_id == workout_id).order_by(WorkoutSet.id)
+    return application.json.dumps([r._asdict() for r in rows])
+
+
+def timed(application, path, workout_id):
+    samples = []
+    for _ in range(ROUNDS):
+        with application.app_context():
+            started = time.perf_counter()
+            body = path(application, workout_id)
+            samples.append(time.perf_counter() - started)
+            # A fresh session each round, so nothing is served from the identity map
+            db.session.remove()
+    return statistics.median(samples) * 1000, body
+
+
+def test_projection_matches_to_dict_and_is_faster(workout):
+    application, workout_id = workout
+    orm_ms, orm_body = timed(application, orm_path, workout_id)
+    projection_ms, projection_body = timed(application, projection_path, workout_id)
+
+    print(f'\n{SETS} sets: to_dict + json {orm_ms:.1f} ms, projection + {type(application.json).__name__} '
+          f'{projection_ms:.1f} ms ({orm_ms / projection_ms:.1f}x)')
+    assert json.loads(projection_body) == json.loads(orm_body)
+    assert len(json.loads(projection_body)) == SETS
+    assert projection_ms < orm_ms
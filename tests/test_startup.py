@@ -0,0 +1,74 @@
+"""Cold-start cost: module import and time to first request, each in a fresh interpreter.
+
+Budgets can be tightened or relaxed per machine with STARTUP_IMPORT_BUDGET_MS
+and STARTUP_FIRST_REQUEST_BUDGET_MS.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 1500))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('STARTUP_FIRST_REQUEST_BUDGET_MS', 2500))
+
+# Only needed once a real token arrives (or a JWKS fetch happens)
+LAZY_MODULES = ('jwt', 'cryptography', 'urllib.request', 'redis')
+
+
+def run_python(*args, env=None):
+    environment = dict(os.environ, JOB_WORKERS='0', **(env or {}))
+    environment.pop('AUTH0_DOMAIN', None)
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, env=environment,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def test_import_time_and_lazy_modules():
+    result = run_python('-X', 'importtime', '-c', 'import app, sys, json; print(json.dumps(sorted(sys.modules)))')
+    modules = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    assert loaded == [], f'imported at startup: {loaded}'
+
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    cumulative = {
+        match.group(2).strip(): int(match.group(1))
+        for match in re.finditer(r'^import time:\s+\d+ \|\s+(\d+) \| (.+)$', result.stderr, re.M)
+    }
+    total_ms = cumulative['app'] / 1000
+    print(f'\nimport app: {total_ms:.0f} ms')
+    assert total_ms <= IMPORT_BUDGET_MS
+
+
+def test_import_does_not_build_the_app():
+    result = run_python('-c', "import app; print('app' in vars(app))")
+    assert result.stdout.strip() == 'False'
+
+
+def test_time_to_first_request(tmp_path):
+    script = '''
+import json, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.app
+created = time.perf_counter()
+response = application.test_client().get('/api/health/ready')
+finished = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'request_ms': (finished - created) * 1000,
+    'total_ms': (finished - started) * 1000,
+    'lazy_loaded': [name for name in %r if name in sys.modules],
+}))
+''' % (LAZY_MODULES,)
+    result = run_python('-c', script, env={'DATABASE_URL': f"sqlite:///{tmp_path / 'startup.db'}"})
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    print('\nfirst request: ' + ', '.join(f'{k} {v:.0f}' for k, v in timings.items() if k.endswith('_ms')))
+    assert timings['status'] == 200
+    assert timings['lazy_loaded'] == []
+    assert timings['total_ms'] <= FIRST_REQUEST_BUDGET_MS
@@ -0,0 +1,50 @@
+"""/api/sync pulls: deleting a dropset parent re-sends its unlinked dropsets"""
+import pytest
+
+
+@pytest.fixture
+def chain(api, workout):
+    """A top set with one dropset, and the watermark a client holds after pulling them"""
+    sets = api.post('/api/sets/batch', json={'sets': [
+        {'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 1, 'weight': 100, 'reps': 5, 'ref': 'top'},
+        {'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 2, 'weight': 80, 'reps': 8,
+         'dropset_parent_ref': 'top'},
+    ]}).get_json()['sets']
+    assert sets[1]['dropset_parent_id'] == sets[0]['id']
+    watermark = api.get('/api/sync').get_json()['watermark']
+    return sets[0], sets[1], watermark
+
+
+def pull(api, since):
+    return api.get(f'/api/sync?since={since}').get_json()
+
+
+def assert_dropset_released(api, parent, dropset, watermark):
+    changes = pull(api, watermark)
+    assert {(d['entity'], d['id']) for d in changes['deleted']} >= {('set', parent['id'])}
+    assert [(s['id'], s['dropset_parent_id']) for s in changes['sets']] == [(dropset['id'], None)]
+    assert changes['watermark'] > watermark
+
+
+def test_deleting_parent_resends_dropset(api, chain):
+    parent, dropset, watermark = chain
+    assert api.delete(f"/api/sets/{parent['id']}").status_code == 200
+    assert_dropset_released(api, parent, dropset, watermark)
+
+
+def test_sync_deleting_parent_resends_dropset(api, chain):
+    parent, dropset, watermark = chain
+    response = api.post('/api/sync', json={'changes': [{'op': 'delete', 'entity': 'set', 'id': parent['id']}]})
+    assert response.get_json()['results'][0]['status'] == 'deleted'
+    assert_dropset_released(api, parent, dropset, watermark)
+
+
+def test_sync_deleting_workout_tombstones_its_dropsets(api, workout, chain):
+    parent, dropset, watermark = chain
+    api.post('/api/sync', json={'changes': [{'op': 'delete', 'entity': 'workout', 'id': workout['id']}]})
+
+    changes = pull(api, watermark)
+    assert changes['sets'] == []
+    assert {(d['entity'], d['id']) for d in changes['deleted']} == {
+        ('workout', workout['id']), ('set', parent['id']), ('set', dropset['id'])
+    }
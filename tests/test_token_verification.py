@@ -0,0 +1,181 @@
+"""Token verification against a stub JWKS endpoint: correctness, cache latency, outage backoff"""
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import app as app_module
+
+# Captured before any fixture swaps in the stub
+real_verify_token = app_module.verify_token
+
+DOMAIN = 'tenant.example.com'
+AUDIENCE = 'https://api.example.com'
+ITERATIONS = 500
+
+
+class StubJWKS:
+    """Serves one RSA public key as a JWKS; `failing` turns it into a 503"""
+
+    def __init__(self, kid='test-key'):
+        self.kid = kid
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        self.body = json.dumps({'keys': [dict(jwk, kid=kid, use='sig', alg='RS256')]}).encode()
+        self.failing = False
+        self.requests = 0
+        self.delay = 0.0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.delay)
+                if stub.failing:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/.well-known/jwks.json'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def token(self, sub='auth0|user', **claims):
+        now = int(time.time())
+        payload = dict({'aud': AUDIENCE, 'iss': f'https://{DOMAIN}/', 'iat': now, 'exp': now + 3600}, sub=sub, **claims)
+        return jwt.encode(payload, self.private_key, algorithm='RS256', headers={'kid': self.kid})
+
+
+@pytest.fixture(scope='module')
+def jwks():
+    stub = StubJWKS()
+    yield stub
+    stub.server.shutdown()
+
+
+@pytest.fixture
+def keys(jwks, monkeypatch):
+    """Real verification, pointed at the stub; returns the signing key cache"""
+    jwks.failing = False
+    jwks.requests = 0
+    jwks.delay = 0.0
+    cache = app_module.SigningKeyCache(jwks.url, min_refresh_interval=1)
+    monkeypatch.setattr(app_module, 'AUTH0_DOMAIN', DOMAIN)
+    monkeypatch.setattr(app_module, 'API_AUDIENCE', AUDIENCE)
+    monkeypatch.setattr(app_module, '_signing_key_cache', cache)
+    monkeypatch.setattr(app_module, '_verified_tokens', app_module.VerifiedTokenCache())
+    return cache
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49] * 1e6, cuts[98] * 1e6
+
+
+def timed(fn, args):
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        assert fn(arg) is not None
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def test_verifies_stub_tokens(jwks, keys):
+    payload = real_verify_token(jwks.token(sub='auth0|alice'))
+    assert payload['sub'] == 'auth0|alice'
+    assert real_verify_token(jwks.token(aud='https://elsewhere')) is None
+    assert jwks.requests == 1
+
+
+def test_requests_with_real_tokens_reach_the_api(app, jwks, keys, monkeypatch):
+    monkeypatch.setattr(app_module, 'verify_token', real_verify_token)
+    client = app.test_client()
+    response = client.get('/api/user/me', headers={'Authorization': f'Bearer {jwks.token(sub="auth0|bob")}'})
+    assert response.status_code == 200
+    assert client.get('/api/user/me', headers={'Authorization': 'Bearer not-a-jwt'}).status_code == 401
+
+
+def test_cached_verification_latency(jwks, keys, record_property):
+    first = timed(real_verify_token, [jwks.token(sub='warmup')])[0]
+
+    # Signing key cached, payload not: a full RS256 verification each time
+    tokens = [jwks.token(sub=f'user-{i}') for i in range(ITERATIONS)]
+    uncached = timed(real_verify_token, tokens)
+    # Same tokens again: served from the verified-token cache
+    cached = timed(real_verify_token, tokens)
+
+    uncached_p50, uncached_p99 = percentiles(uncached)
+    cached_p50, cached_p99 = percentiles(cached)
+    print(f'\nfirst call (JWKS fetch): {first * 1e6:.0f} us')
+    print(f'uncached: p50 {uncached_p50:.1f} us, p99 {uncached_p99:.1f} us')
+    print(f'cached:   p50 {cached_p50:.1f} us, p99 {cached_p99:.1f} us')
+    for name, value in [('uncached_p50_us', uncached_p50), ('uncached_p99_us', uncached_p99),
+                        ('cached_p50_us', cached_p50), ('cached_p99_us', cached_p99)]:
+        record_property(name, round(value, 1))
+
+    assert jwks.requests == 1
+    assert cached_p50 * 5 < uncached_p50
+    assert cached_p99 < uncached_p99
+
+
+def test_outage_serves_stale_keys_with_one_fetch(jwks, keys):
+    assert real_verify_token(jwks.token(sub='warmup'))
+    jwks.failing = True
+    jwks.delay = 0.1
+    keys._fetched_at -= keys.ttl + 1  # expired: every call now wants a refresh
+
+    start = threading.Barrier(10)
+    results = [None] * 10
+
+    def verify(i):
+        token = jwks.token(sub=f'outage-{i}')
+        start.wait()
+        results[i] = real_verify_token(token)
+
+    threads = [threading.Thread(target=verify, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [payload['sub'] for payload in results] == [f'outage-{i}' for i in range(10)]
+    assert jwks.requests == 2
+    # Still inside the backoff window: no further fetches
+    assert real_verify_token(jwks.token(sub='later'))
+    assert jwks.requests == 2
+
+
+def test_outage_without_keys_fetches_once(jwks, keys):
+    jwks.failing = True
+    jwks.delay = 0.1
+    start = threading.Barrier(10)
+    results = [None] * 10
+
+    def verify(i):
+        token = jwks.token(sub=f'cold-{i}')
+        start.wait()
+        results[i] = real_verify_token(token)
+
+    threads = [threading.Thread(target=verify, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [None] * 10
+    assert jwks.requests == 1
@@ -0,0 +1,48 @@
+"""Every write locks the user's row (the data_version bump) before any other row.
+
+Writers that lock rows in different orders can deadlock each other on
+Postgres, so bump_data_version must be the first write of each request.
+"""
+import json
+
+import pytest
+
+
+def first_write(statements):
+    writes = [s for s in statements if not s.lstrip().upper().startswith('SELECT')]
+    return writes[0] if writes else None
+
+
+@pytest.fixture
+def logged(api, workout):
+    return api.post('/api/sets', json={
+        'workout_id': workout['id'], 'exercise_id': 1, 'set_number': 1, 'weight': 60, 'reps': 5
+    }).get_json()
+
+
+WRITES = {
+    'start': lambda ids: ('POST', '/api/workouts/start', {'json': {'workout_type': 1}}),
+    'end': lambda ids: ('PUT', f"/api/workouts/{ids['workout_id']}/end", {}),
+    'log_set': lambda ids: ('POST', '/api/sets', {'json': {
+        'workout_id': ids['workout_id'], 'exercise_id': 1, 'set_number': 2, 'weight': 60, 'reps': 5}}),
+    'update_set': lambda ids: ('PUT', f"/api/sets/{ids['set_id']}", {'json': {'weight': 65}}),
+    'delete_set': lambda ids: ('DELETE', f"/api/sets/{ids['set_id']}", {}),
+    'batch': lambda ids: ('POST', '/api/sets/batch', {'json': {'sets': [
+        {'workout_id': ids['workout_id'], 'exercise_id': 1, 'set_number': 3, 'weight': 60, 'reps': 5}]}}),
+    'bodyweight': lambda ids: ('POST', '/api/bodyweight', {'json': {'weight': 80}}),
+    'sync': lambda ids: ('POST', '/api/sync', {'json': {'changes': [
+        {'op': 'upsert', 'entity': 'workout', 'id': ids['workout_id'], 'data': {'notes': 'synced'}},
+        {'op': 'delete', 'entity': 'set', 'id': ids['set_id']}]}}),
+    'import': lambda ids: ('POST', '/api/import', {
+        'data': json.dumps({'date': '2024-01-02', 'exercise': 'Squat', 'weight': 100, 'reps': 5}),
+        'content_type': 'application/x-ndjson'}),
+}
+
+
+@pytest.mark.parametrize('name', sorted(WRITES))
+def test_data_version_is_bumped_first(api, queries, workout, logged, name):
+    method, url, kwargs = WRITES[name]({'workout_id': workout['id'], 'set_id': logged['id']})
+    with queries:
+        response = api.request(method, url, **kwargs)
+    assert response.status_code < 400, response.get_data()
+    assert first_write(queries.statements).startswith('UPDATE users SET data_version'), queries.statements